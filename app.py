@@ -1,54 +1,153 @@
 # Install required packages
-!pip install gradio wikipedia wikipedia-api plotly
+!pip install gradio wikipedia wikipedia-api plotly "httpx[http2]" orjson brotli
 
+import re
 import urllib.parse
 import datetime
-import requests
+import html
+import asyncio
+import collections
+import functools
+import httpx
+import orjson
 import pandas as pd
 import plotly.graph_objects as go
 import gradio as gr
 
+# Shared HTTP/2 client so all pageview calls are multiplexed over one connection to wikimedia.org
+CLIENT = httpx.AsyncClient(http2=True, limits=httpx.Limits(max_keepalive_connections=8))
+
+# Request brotli (smaller) or gzip bodies; httpx decodes them straight to bytes for orjson
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; GradioApp/1.0; +https://gradio.app)",
+    "Accept-Encoding": "br, gzip"
+}
+
+PAGEVIEWS_URL = (
+    "https://wikimedia.org/api/rest_v1/metrics/pageviews/per-article/"
+    "en.wikipedia.org/all-access/all-agents/{article}/daily/{start}/{end}"
+)
+
+# LRU cache of compact (timestamp, views) lists keyed on (article, start_str, end_str)
+PAGEVIEW_CACHE = collections.OrderedDict()
+PAGEVIEW_CACHE_SIZE = 512
+# Pageview data is in UTC and published a day or two late
+PAGEVIEW_CACHE_LAG = datetime.timedelta(days=2)
+
+# Cap in-flight API requests, matching the client's keep-alive pool
+FETCH_LIMIT = asyncio.Semaphore(8)
+
+# Trace colors, cycled when more articles are compared
+TRACE_COLORS = ['red', 'blue', 'green', 'orange', 'purple', 'brown']
+
+# Layout shared by every quarterly plot; plotly copies and re-validates it per figure
+PLOT_LAYOUT = go.Layout(
+    title="Quarterly Average Daily Pageviews",
+    xaxis_title="Quarter",
+    yaxis_title="Avg Daily Views",
+    plot_bgcolor="aliceblue",
+    paper_bgcolor="lavender",
+    hovermode="x unified"
+)
+
+WIKI_URL_RE = re.compile(r"https?://[^/]+/wiki/([^?#]+)", re.IGNORECASE)
+
 # --- Helper Functions ---
+@functools.lru_cache(maxsize=512)
+def encode_article(article):
+    return urllib.parse.quote(article, safe='')
+
 def extract_title(url):
-    parsed = urllib.parse.urlparse(url)
-    if parsed.path.startswith("/wiki/"):
-        return parsed.path.split("/wiki/")[1]
-    else:
+    match = WIKI_URL_RE.match(url)
+    if not match:
         raise ValueError("Invalid Wikipedia URL")
-
-def get_pageviews(article, start_str, end_str):
-    encoded_article = urllib.parse.quote(article, safe='')
-    url = (
-        f"https://wikimedia.org/api/rest_v1/metrics/pageviews/per-article/"
-        f"en.wikipedia.org/all-access/all-agents/{encoded_article}/daily/{start_str}/{end_str}"
-    )
-    headers = {
-        "User-Agent": "Mozilla/5.0 (compatible; GradioApp/1.0; +https://gradio.app)"
-    }
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        return response.json().get("items", [])
-    return []
+    return match.group(1)
+
+async def get_pageviews_async(client, article, start_str, end_str):
+    # Only ranges ending before the publication lag are final; recent days may still be filled in
+    settled = datetime.datetime.now(datetime.timezone.utc).date() - PAGEVIEW_CACHE_LAG
+    cacheable = end_str[:8] <= settled.strftime("%Y%m%d")
+    key = (article, start_str, end_str)
+    if cacheable and key in PAGEVIEW_CACHE:
+        PAGEVIEW_CACHE.move_to_end(key)
+        return PAGEVIEW_CACHE[key]
+
+    url = PAGEVIEWS_URL.format(article=encode_article(article), start=start_str, end=end_str)
+    async with FETCH_LIMIT:
+        response = await client.get(url, headers=HEADERS, timeout=10)
+    if response.status_code != 200:
+        return []
+    try:
+        raw_items = orjson.loads(response.content).get("items", [])
+    except orjson.JSONDecodeError:
+        raw_items = response.json().get("items", [])
+    # Only the timestamp and views are used downstream; drop the other five keys per day
+    items = [(item.get("timestamp", ""), item.get("views")) for item in raw_items]
+    if cacheable:
+        PAGEVIEW_CACHE[key] = items
+        if len(PAGEVIEW_CACHE) > PAGEVIEW_CACHE_SIZE:
+            PAGEVIEW_CACHE.popitem(last=False)
+    return items
+
+def parse_timestamp(ts):
+    # API timestamps are always YYYYMMDDHH, so slice-and-cast instead of strptime
+    try:
+        return datetime.date(int(ts[0:4]), int(ts[4:6]), int(ts[6:8])) if len(ts) >= 8 else None
+    except (TypeError, ValueError):
+        return None
 
 def process_data(items, article_label):
-    records = []
-    for item in items:
-        ts = item.get("timestamp", "")
+    df = pd.DataFrame(items, columns=["timestamp", "views"])
+    try:
+        df["date"] = pd.to_datetime(df["timestamp"], format="%Y%m%d%H", cache=True).dt.date
+    except (TypeError, ValueError):
+        # Malformed timestamps: parse row by row, leaving bad ones as None
+        df["date"] = [parse_timestamp(ts) for ts in df["timestamp"]]
+    df["views"] = df["views"].fillna(0)
+    df = df.rename(columns={"views": f"views_{article_label}"})[["date", f"views_{article_label}"]]
+    return df.set_index("date").sort_index()
+
+def render_table(df):
+    # Plain string template; the pandas HTML formatter is overkill for a 20-row preview
+    header = "".join(f"<th>{html.escape(str(c))}</th>" for c in df.columns)
+    rows = "".join(
+        "<tr>" + "".join(f"<td>{'' if pd.isna(v) else v}</td>" for v in row) + "</tr>"
+        for row in df.itertuples(index=False, name=None)
+    )
+    return (f'<table border="1" class="dataframe"><thead><tr>{header}</tr></thead>'
+            f"<tbody>{rows}</tbody></table>")
+
+def quarterly_means(items):
+    # Single pass over the raw items; quarter key is year * 4 + quarter index
+    sums = collections.defaultdict(float)
+    cnts = collections.defaultdict(int)
+    for ts, views in items:
         try:
-            date = datetime.datetime.strptime(ts, "%Y%m%d%H").date()
-        except:
-            date = None
-        views = item.get("views", 0)
-        records.append({"date": date, f"views_{article_label}": views})
-    return pd.DataFrame(records)
+            q = int(ts[0:4]) * 4 + (int(ts[4:6]) - 1) // 3
+        except (TypeError, ValueError):
+            continue
+        if views is None:
+            # Null views are missing data, not zero-view days; keep them out of the mean
+            continue
+        sums[q] += views
+        cnts[q] += 1
+    return {q: sums[q] / cnts[q] for q in sums}
+
+def quarter_label(q):
+    # Inverse of the quarterly_means key
+    return f"Q{q % 4 + 1} {q // 4}"
 
 # --- Main App Logic ---
-def analyze_wiki(url1, url2, start_date_str, end_date_str):
+async def analyze_wiki(urls, start_date_str, end_date_str):
+    if isinstance(urls, str):
+        urls = urls.split()
     try:
-        article1 = extract_title(url1)
-        article2 = extract_title(url2)
+        # Deduplicate while keeping input order
+        articles = list(dict.fromkeys(extract_title(url) for url in urls))
     except Exception as e:
         return f"URL Error: {e}", None
+    if not articles:
+        return "URL Error: enter at least one Wikipedia URL", None
 
     # Parse dates
     try:
@@ -60,41 +159,33 @@ def analyze_wiki(url1, url2, start_date_str, end_date_str):
     start_str = start_date.strftime("%Y%m%d") + "00"
     end_str   = end_date.strftime("%Y%m%d") + "00"
 
-    data1 = get_pageviews(article1, start_str, end_str)
-    data2 = get_pageviews(article2, start_str, end_str)
-
-    df1 = process_data(data1, article1)
-    df2 = process_data(data2, article2)
+    # Fetch all articles concurrently
+    results = await asyncio.gather(
+        *[get_pageviews_async(CLIENT, article, start_str, end_str) for article in articles]
+    )
 
-    if df1.empty or df2.empty:
+    if not all(results):
         return "No data returned from Wikipedia API", None
 
-    merged_df = pd.merge(df1, df2, on="date", how="outer").sort_values("date")
-    table_html = merged_df.head(20).to_html(index=False)
+    # The API returns each article's items sorted by date with no duplicate days, so the
+    # first 20 dates of the sorted union all fall within each article's first 20 items
+    # and the table only needs to align those head slices
+    dfs = [process_data(items[:20], article) for items, article in zip(results, articles)]
+    merged_df = pd.concat(dfs, axis=1, join="outer", sort=True).reset_index()
+    table_html = render_table(merged_df.head(20))
 
-    # Quarterly Aggregation
-    merged_df['date'] = pd.to_datetime(merged_df['date'])
-    merged_df['quarter'] = merged_df['date'].dt.to_period('Q')
-    quarter_df = merged_df.groupby('quarter').agg({
-        f'views_{article1}': 'mean',
-        f'views_{article2}': 'mean'
-    }).reset_index()
-    quarter_df['quarter_str'] = quarter_df['quarter'].apply(lambda r: f"Q{r.quarter} {r.year}")
+    # Quarterly Aggregation, straight from the raw items without a daily merge
+    means = [quarterly_means(items) for items in results]
+    quarters = sorted(set().union(*means))
+    quarter_str = [quarter_label(q) for q in quarters]
 
     # Plotly Graph
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=quarter_df['quarter_str'], y=quarter_df[f'views_{article1}'],
-                             mode='lines+markers', name=article1, marker=dict(color='red')))
-    fig.add_trace(go.Scatter(x=quarter_df['quarter_str'], y=quarter_df[f'views_{article2}'],
-                             mode='lines+markers', name=article2, marker=dict(color='blue')))
-    fig.update_layout(
-        title="Quarterly Average Daily Pageviews",
-        xaxis_title="Quarter",
-        yaxis_title="Avg Daily Views",
-        plot_bgcolor="aliceblue",
-        paper_bgcolor="lavender",
-        hovermode="x unified"
-    )
+    fig = go.Figure(data=[
+        go.Scatter(x=quarter_str, y=[article_means.get(q) for q in quarters],
+                   mode='lines+markers', name=article,
+                   marker=dict(color=TRACE_COLORS[i % len(TRACE_COLORS)]))
+        for i, (article, article_means) in enumerate(zip(articles, means))
+    ], layout=PLOT_LAYOUT)
 
     return table_html, fig
 
@@ -102,8 +193,7 @@ def analyze_wiki(url1, url2, start_date_str, end_date_str):
 demo = gr.Interface(
     fn=analyze_wiki,
     inputs=[
-        gr.Textbox(label="Wikipedia URL 1"),
-        gr.Textbox(label="Wikipedia URL 2"),
+        gr.Textbox(label="Wikipedia URLs (one per line)", lines=4),
         gr.Textbox(label="Start Date (YYYY-MM-DD)"),
         gr.Textbox(label="End Date (YYYY-MM-DD)")
     ],
@@ -112,7 +202,7 @@ demo = gr.Interface(
         gr.Plot(label="Quarterly View Plot")
     ],
     title="📈 Wikipedia Pageview Analyzer",
-    description="Enter two Wikipedia article URLs and a date range (YYYY-MM-DD) to compare their pageviews."
+    description="Enter Wikipedia article URLs (one per line) and a date range (YYYY-MM-DD) to compare their pageviews."
 )
 
 demo.launch()